@@ -5,6 +5,9 @@ from datetime import datetime, timedelta
 import pandas as pd
 import plotly.express as px
 import os
+import io
+import queue
+from contextlib import contextmanager
 
 # Set page config
 st.set_page_config(
@@ -16,27 +19,87 @@ st.set_page_config(
 
 # Database setup - Use environment variable for database path in production
 DB_PATH = os.getenv('DATABASE_PATH', 'bids.db')
-conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+
+@st.cache_resource
+def get_conn():
+    """Open the shared read/write connection once per process."""
+    rw = sqlite3.connect(DB_PATH, check_same_thread=False)
+    rw.row_factory = sqlite3.Row
+    rw.execute("PRAGMA journal_mode=WAL")
+    rw.execute("PRAGMA synchronous=NORMAL")
+    rw.execute("PRAGMA cache_size=-65536")
+    rw.execute("PRAGMA temp_store=MEMORY")
+    rw.execute("PRAGMA mmap_size=268435456")
+    rw.execute("PRAGMA busy_timeout=5000")
+    rw.execute("PRAGMA foreign_keys=ON")
+    return rw
+
+@st.cache_resource
+def get_read_pool(size=5):
+    """Bounded pool of read-only connections for dashboard queries."""
+    pool = queue.Queue(maxsize=size)
+    for _ in range(size):
+        ro = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True,
+                             check_same_thread=False)
+        ro.row_factory = sqlite3.Row
+        ro.execute("PRAGMA busy_timeout=5000")
+        pool.put(ro)
+    return pool
+
+@contextmanager
+def read_conn():
+    """Borrow a read-only connection from the pool for one query."""
+    pool = get_read_pool()
+    ro = pool.get()
+    try:
+        yield ro
+    finally:
+        pool.put(ro)
+
+conn = get_conn()
 c = conn.cursor()
 
+# Columns added to bids after the initial release, with their DDL types
+REQUIRED_BID_COLUMNS = {
+    "client_name": "TEXT",
+    "bid_value": "REAL",
+    "reason": "TEXT",
+    "stage": "TEXT DEFAULT 'Proposal Drafting'",
+}
+
 def update_database_schema():
     """Check and update database schema if needed"""
-    # Check if bid_value column exists
     c.execute("PRAGMA table_info(bids)")
-    columns = [col[1] for col in c.fetchall()]
-    
-    # Add missing columns
-    if 'client_name' not in columns:
-        c.execute("ALTER TABLE bids ADD COLUMN client_name TEXT")
-    if 'bid_value' not in columns:
-        c.execute("ALTER TABLE bids ADD COLUMN bid_value REAL")
-    if 'reason' not in columns:
-        c.execute("ALTER TABLE bids ADD COLUMN reason TEXT")
-    if 'stage' not in columns:
-        c.execute("ALTER TABLE bids ADD COLUMN stage TEXT DEFAULT 'Proposal Drafting'")
-    
+    columns = {col[1] for col in c.fetchall()}
+
+    # Add missing columns in one transaction
+    for name in REQUIRED_BID_COLUMNS.keys() - columns:
+        c.execute(f"ALTER TABLE bids ADD COLUMN {name} {REQUIRED_BID_COLUMNS[name]}")
+
+    # Indexes for the audit-trail and dashboard lookups (tables grow unbounded)
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_history_bid
+                 ON bid_history(bid_id, changed_at DESC)''')
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_history_changed_at
+                 ON bid_history(changed_at DESC)''')
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_stages_bid_open
+                 ON bid_stages(bid_id) WHERE completed_at IS NULL''')
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_stages_open
+                 ON bid_stages(completed_at) WHERE completed_at IS NULL''')
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_docs_bid
+                 ON documents(bid_id)''')
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_bids_open_due
+                 ON bids(due_date) WHERE status = 'Open' ''')
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_bids_status
+                 ON bids(status)''')
+
     conn.commit()
 
+@st.cache_resource
+def ensure_schema():
+    """Run the schema check once per process instead of on every rerun"""
+    update_database_schema()
+    return True
+
 # Create tables with enhanced schema
 c.execute('''CREATE TABLE IF NOT EXISTS bids
             (id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -83,11 +146,10 @@ c.execute('''CREATE TABLE IF NOT EXISTS bid_stages
              completed_at DATETIME,
              notes TEXT)''')
 
-# Insert default admin user if empty
-c.execute("SELECT COUNT(*) FROM users")
-if c.fetchone()[0] == 0:
-    c.execute("INSERT INTO users (username, role) VALUES (?, ?)", ("admin", "admin"))
-    conn.commit()
+# Insert default admin user if missing (UPSERT avoids the COUNT pre-check)
+c.execute('''INSERT INTO users (username, role) VALUES ('admin', 'admin')
+             ON CONFLICT(username) DO NOTHING''')
+conn.commit()
 
 # Define bid stages and default owners
 BID_STAGES = {
@@ -100,72 +162,299 @@ BID_STAGES = {
     "Lost": "Sales Lead"
 }
 
-def log_bid_history(bid_id, field_changed, old_value, new_value):
-    """Record changes to bids for audit trail"""
+# Stage names in pipeline order, precomputed once for the hot render path
+BID_STAGE_KEYS = tuple(BID_STAGES)
+
+# Rows shown per page of the dashboard bid table
+PAGE_SIZE = 100
+
+def _bid_filters(status_filter, assigned_like):
+    """Build the shared WHERE clause for the dashboard filters."""
+    params = []
+    conditions = []
+
+    if status_filter:
+        conditions.append(f"status IN ({','.join(['?']*len(status_filter))})")
+        params.extend(status_filter)
+    if assigned_like:
+        conditions.append("assigned_to LIKE ?")
+        params.append(f"%{assigned_like}%")
+
+    clause = " WHERE " + " AND ".join(conditions) if conditions else ""
+    return clause, params
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_bids(status_filter=(), assigned_like="", limit=None, offset=0):
+    """Load bids matching the given filters, optionally one page at a time."""
+    query = '''SELECT id, title, status, stage, due_date,
+                      assigned_to, client_name, bid_value FROM bids'''
+    clause, params = _bid_filters(status_filter, assigned_like)
+    query += clause
+
+    if limit is not None:
+        query += " ORDER BY id DESC LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+
+    with read_conn() as ro:
+        return pd.read_sql(query, ro, params=params,
+                           parse_dates=['due_date'])
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_bid_metrics(status_filter=(), assigned_like="", as_of=None):
+    """Aggregate per-status bid metrics in SQL instead of pandas."""
+    query = '''SELECT status, COUNT(*) AS n,
+                      COALESCE(SUM(bid_value), 0) AS total_value,
+                      SUM(CASE WHEN due_date >= ? THEN 1 ELSE 0 END) AS upcoming
+               FROM bids'''
+    clause, params = _bid_filters(status_filter, assigned_like)
+    query += clause + " GROUP BY status"
+
+    with read_conn() as ro:
+        return pd.read_sql(query, ro, params=[as_of] + params)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_client_status_counts(status_filter=(), assigned_like=""):
+    """Per-client/status counts for the client chart, aggregated in SQL."""
+    query = "SELECT client_name, status, COUNT(*) AS n FROM bids"
+    clause, params = _bid_filters(status_filter, assigned_like)
+    query += clause + " GROUP BY client_name, status"
+
+    with read_conn() as ro:
+        return pd.read_sql(query, ro, params=params)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_bid_values(status_filter=(), assigned_like=""):
+    """Status/value pairs for the value distribution chart."""
+    query = "SELECT status, bid_value FROM bids"
+    clause, params = _bid_filters(status_filter, assigned_like)
+    conjunction = " AND " if clause else " WHERE "
+    query += clause + conjunction + "bid_value IS NOT NULL"
+
+    with read_conn() as ro:
+        return pd.read_sql(query, ro, params=params)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_status_summary():
+    """Per-status counts and average bid age, aggregated in SQL."""
+    with read_conn() as ro:
+        return pd.read_sql(
+            '''SELECT status, COUNT(*) AS n,
+                      AVG(julianday('now') - julianday(created_at)) AS avg_days
+               FROM bids GROUP BY status''',
+            ro)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_loss_reasons():
+    """Counts of recorded reasons for lost bids."""
+    with read_conn() as ro:
+        return pd.read_sql(
+            '''SELECT reason, COUNT(*) AS n FROM bids
+               WHERE status = 'Lost' AND reason IS NOT NULL AND reason != ''
+               GROUP BY reason''',
+            ro)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_documents(bid_id):
+    """Load documents attached to a bid (cached between reruns)."""
+    with read_conn() as ro:
+        return pd.read_sql(
+            "SELECT id, document_name, sharepoint_url, uploaded_at FROM documents WHERE bid_id=?",
+            ro, params=(bid_id,), parse_dates=['uploaded_at'])
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_bid_history(bid_id):
+    """Load the latest audit entries for a bid; full history goes via export."""
+    with read_conn() as ro:
+        return pd.read_sql(
+            '''SELECT changed_at, changed_by, field_changed, old_value, new_value
+               FROM bid_history WHERE bid_id=? ORDER BY changed_at DESC LIMIT 50''',
+            ro, params=(bid_id,), parse_dates=['changed_at'])
+
+def iter_history(bid_id, chunk_size=10_000):
+    """Stream a bid's full history in chunks instead of materializing it."""
+    with read_conn() as ro:
+        for chunk in pd.read_sql_query(
+                '''SELECT changed_at, changed_by, field_changed, old_value, new_value
+                   FROM bid_history WHERE bid_id=? ORDER BY changed_at''',
+                ro, params=(bid_id,), chunksize=chunk_size):
+            yield chunk
+
+@st.cache_data(ttl=60, show_spinner=False)
+def export_history_csv(bid_id):
+    """Build a CSV export of a bid's history, one chunk in memory at a time."""
+    buf = io.StringIO()
+    for i, chunk in enumerate(iter_history(bid_id)):
+        chunk.to_csv(buf, index=False, header=(i == 0))
+    return buf.getvalue()
+
+@st.cache_data(ttl=30, show_spinner=False)
+def load_recent_activity(limit=50):
+    """Load the latest audit entries across all bids (index-backed tail fetch)."""
+    with read_conn() as ro:
+        return pd.read_sql(
+            '''SELECT h.id, h.bid_id, h.changed_at, h.changed_by,
+                      h.field_changed, h.old_value, h.new_value,
+                      b.title AS bid_title
+               FROM bid_history h JOIN bids b ON h.bid_id = b.id
+               ORDER BY h.changed_at DESC LIMIT ?''',
+            ro, params=(limit,), parse_dates=['changed_at'])
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_bid_stages(bid_id):
+    """Load the stage progress for a bid (cached between reruns)."""
+    with read_conn() as ro:
+        return pd.read_sql(
+            '''SELECT stage, stage_owner, started_at, completed_at, notes
+               FROM bid_stages WHERE bid_id=? ORDER BY started_at''',
+            ro, params=(bid_id,), parse_dates=['started_at', 'completed_at'])
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_users():
+    """Load the user list (cached between reruns)."""
+    with read_conn() as ro:
+        return pd.read_sql("SELECT username, role FROM users", ro)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_upcoming_deadlines(cutoff_date):
+    """Load the most urgent open bids due on or before cutoff_date."""
+    with read_conn() as ro:
+        return pd.read_sql(
+            '''SELECT id, title, due_date FROM bids
+               WHERE status = 'Open' AND due_date <= ?
+               ORDER BY due_date ASC LIMIT 20''',
+            ro, params=(cutoff_date,), parse_dates=['due_date'])
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_active_stages():
+    """Load bids with an in-progress stage (cached between reruns)."""
+    with read_conn() as ro:
+        return pd.read_sql(
+            '''SELECT bs.bid_id, b.title, bs.stage, bs.stage_owner
+               FROM bid_stages bs JOIN bids b ON bs.bid_id = b.id
+               WHERE bs.completed_at IS NULL
+               LIMIT 50''',
+            ro)
+
+# Fingerprint pandas arguments by content so unchanged data is a cache hit
+_PANDAS_HASH = {
+    pd.DataFrame: lambda d: pd.util.hash_pandas_object(d, index=True).values.tobytes(),
+    pd.Series: lambda s: pd.util.hash_pandas_object(s, index=True).values.tobytes(),
+}
+
+@st.cache_data(show_spinner=False, hash_funcs=_PANDAS_HASH)
+def build_status_pie(status_counts):
+    """Build the status distribution pie (cached on the data fingerprint)."""
+    return px.pie(values=status_counts.values, names=status_counts.index,
+                 title='Bid Status Distribution')
+
+@st.cache_data(show_spinner=False, hash_funcs=_PANDAS_HASH)
+def build_value_box(bids):
+    """Build the bid value box plot (cached on the data fingerprint)."""
+    return px.box(bids, y='bid_value', x='status',
+                 title='Bid Value Distribution by Status',
+                 log_y=True)
+
+@st.cache_data(show_spinner=False, hash_funcs=_PANDAS_HASH)
+def build_loss_reasons_pie(loss_reasons):
+    """Build the loss reasons pie (cached on the data fingerprint)."""
+    return px.pie(loss_reasons, values='n',
+                 names='reason', title='Reasons for Lost Bids')
+
+def clear_bid_caches():
+    """Drop every cache derived from the bids table after a write."""
+    load_bids.clear()
+    load_bid_metrics.clear()
+    load_client_status_counts.clear()
+    load_bid_values.clear()
+    load_status_summary.clear()
+    load_loss_reasons.clear()
+    load_upcoming_deadlines.clear()
+
+def log_bid_history(bid_id, field_changed, old_value, new_value, commit=True):
+    """Record changes to bids for audit trail
+
+    Pass commit=False when the caller batches several writes into one
+    transaction and commits itself.
+    """
     c.execute('''INSERT INTO bid_history
                 (bid_id, changed_at, changed_by, field_changed, old_value, new_value)
                 VALUES (?, ?, ?, ?, ?, ?)''',
-                (bid_id, datetime.now(), st.session_state.user[1], 
+                (bid_id, datetime.now(), st.session_state.user[1],
                  field_changed, str(old_value), str(new_value)))
-    conn.commit()
+    if commit:
+        conn.commit()
+    load_bid_history.clear()
+    load_recent_activity.clear()
+    export_history_csv.clear()
 
-def update_bid_stage(bid_id, new_stage, notes=""):
-    """Transition bid to new stage and record the change"""
+def update_bid_stage(bid_id, new_stage, notes="", commit=True):
+    """Transition bid to new stage and record the change
+
+    Pass commit=False when the caller batches several writes into one
+    transaction and commits itself.
+    """
     # Complete current stage if exists
-    c.execute('''UPDATE bid_stages 
+    c.execute('''UPDATE bid_stages
                 SET completed_at = ?
                 WHERE bid_id = ? AND completed_at IS NULL''',
                 (datetime.now(), bid_id))
-    
+
     # Start new stage
     c.execute('''INSERT INTO bid_stages
                 (bid_id, stage, stage_owner, started_at, notes)
                 VALUES (?, ?, ?, ?, ?)''',
-                (bid_id, new_stage, BID_STAGES.get(new_stage, "Unassigned"), 
+                (bid_id, new_stage, BID_STAGES.get(new_stage, "Unassigned"),
                  datetime.now(), notes))
-    conn.commit()
-    
+    if commit:
+        conn.commit()
+    load_bid_stages.clear()
+    load_active_stages.clear()
+
     # Notify relevant team (simulated)
     st.sidebar.success(f"Notification: Bid moved to {new_stage} stage. Owner: {BID_STAGES.get(new_stage, 'Unassigned')}")
 
 def show_deadline_reminders():
-    """Show upcoming deadlines in sidebar"""
+    """Show upcoming deadlines (rendered inside the sidebar fragment)"""
     today = datetime.now().date()
-    upcoming = pd.read_sql(
-        "SELECT id, title, due_date FROM bids WHERE due_date <= ? AND status = 'Open'",
-        conn, params=(today + timedelta(days=3),)
-    )
+    upcoming = load_upcoming_deadlines(today + timedelta(days=3))
     if not upcoming.empty:
-        st.sidebar.warning("⚠️ Bids Due Soon")
-        for _, row in upcoming.iterrows():
-            st.sidebar.write(f"📌 {row['title']} (ID: {row['id']}) - due {row['due_date']}")
+        st.warning("⚠️ Bids Due Soon")
+        # One markdown block instead of one websocket message per row
+        st.markdown("\n".join(
+            f"- 📌 **{title}** (ID: {bid_id}) - due {due.date()}"
+            for bid_id, title, due in zip(upcoming['id'], upcoming['title'], upcoming['due_date'])))
 
 def show_stage_notifications():
-    """Show stage transition notifications"""
-    active_stages = pd.read_sql(
-        '''SELECT bs.bid_id, b.title, bs.stage, bs.stage_owner 
-           FROM bid_stages bs JOIN bids b ON bs.bid_id = b.id 
-           WHERE bs.completed_at IS NULL''',
-        conn)
-    
+    """Show stage transition notifications (rendered inside the sidebar fragment)"""
+    active_stages = load_active_stages()
+
     if not active_stages.empty:
-        st.sidebar.info("🔄 Active Stages")
-        for _, row in active_stages.iterrows():
-            st.sidebar.write(f"🔹 {row['title']} (ID: {row['bid_id']})")
-            st.sidebar.write(f"   Stage: {row['stage']} (Owner: {row['stage_owner']})")
+        st.info("🔄 Active Stages")
+        st.markdown("\n".join(
+            f"- 🔹 **{title}** (ID: {bid_id})  \n  Stage: {stage} (Owner: {owner})"
+            for bid_id, title, stage, owner in zip(
+                active_stages['bid_id'], active_stages['title'],
+                active_stages['stage'], active_stages['stage_owner'])))
+
+@st.fragment(run_every=60)
+def sidebar_notifications():
+    """Refresh reminders on a timer without rerunning the whole page"""
+    show_deadline_reminders()
+    show_stage_notifications()
 
 def main():
     st.title("Bid Monitoring Platform")
-    update_database_schema()
+    ensure_schema()
     
     # Initialize user session if not exists
     if 'user' not in st.session_state:
         st.session_state.user = ("test_id", "admin", "admin")
     
-    show_deadline_reminders()
-    show_stage_notifications()
+    with st.sidebar:
+        sidebar_notifications()
     show_main_interface()
 
+@st.fragment
 def show_dashboard():
     st.header("Bid Dashboard")
 
@@ -176,120 +465,108 @@ def show_dashboard():
     with col2:
         assigned_filter = st.text_input("Filter by assigned user")
 
-    # Query construction
-    query = "SELECT * FROM bids"
-    params = []
-    conditions = []
-    
-    if status_filter:
-        conditions.append(f"status IN ({','.join(['?']*len(status_filter))})")
-        params.extend(status_filter)
-    if assigned_filter:
-        conditions.append("assigned_to LIKE ?")
-        params.append(f"%{assigned_filter}%")
-    
-    if conditions:
-        query += " WHERE " + " AND ".join(conditions)
-
-    # Data fetch
-    bids = pd.read_sql(query, conn, params=params)
+    # Aggregates first - they also give the total row count for paging
+    # (tuple keeps the filter hashable for the cache)
+    metrics = load_bid_metrics(tuple(status_filter), assigned_filter,
+                               datetime.now().date())
+    counts = dict(zip(metrics['status'], metrics['n']))
+    total_rows = int(metrics['n'].sum())
 
-    # Display
+    # Display - one page at a time so render cost doesn't grow with the table
     st.subheader("Bid Table")
-    if not bids.empty:
+    if total_rows:
+        total_pages = -(-total_rows // PAGE_SIZE)
+        page = st.number_input("Page", min_value=1, max_value=total_pages, value=1)
+        bids = load_bids(tuple(status_filter), assigned_filter,
+                         limit=PAGE_SIZE, offset=(page - 1) * PAGE_SIZE)
         st.dataframe(bids, use_container_width=True)
+        st.caption(f"Page {page} of {total_pages} ({total_rows} bids)")
     else:
         st.info("No bids found matching the current filters.")
 
-    # Metrics
+    # Metrics - aggregated in SQL, one small row per status
     st.subheader("Performance Metrics")
+
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        active_count = len(bids[bids['status'] == 'Open']) if not bids.empty else 0
-        st.metric("Active Bids", active_count)
+        st.metric("Active Bids", counts.get('Open', 0))
     with col2:
-        if not bids.empty:
-            won_bids = len(bids[bids['status'] == 'Won'])
-            total_outcomes = len(bids[bids['status'].isin(['Won', 'Lost'])])
-            win_rate = (won_bids / total_outcomes * 100) if total_outcomes else 0
-            st.metric("Win Rate", f"{win_rate:.1f}%")
-        else:
-            st.metric("Win Rate", "0%")
+        total_outcomes = counts.get('Won', 0) + counts.get('Lost', 0)
+        win_rate = (counts.get('Won', 0) / total_outcomes * 100) if total_outcomes else 0
+        st.metric("Win Rate", f"{win_rate:.1f}%")
     with col3:
-        if not bids.empty and 'bid_value' in bids.columns:
-            total_value = bids['bid_value'].sum(skipna=True) / 1e6
+        if not metrics.empty:
+            total_value = metrics['total_value'].sum() / 1e6
             st.metric("Total Pipeline Value", f"${total_value:.2f}M")
         else:
             st.metric("Total Pipeline Value", "N/A")
     with col4:
-        if not bids.empty:
-            upcoming = len(bids[pd.to_datetime(bids['due_date']) >= datetime.now()])
-            st.metric("Upcoming Deadlines", upcoming)
-        else:
-            st.metric("Upcoming Deadlines", 0)
+        st.metric("Upcoming Deadlines", int(metrics['upcoming'].sum()) if not metrics.empty else 0)
 
     # Visualizations
     st.subheader("Performance Analysis")
     tab1, tab2, tab3 = st.tabs(["Win/Loss", "By Client", "Value Analysis"])
     
     with tab1:
-        if not bids.empty:
-            fig = px.pie(bids, names='status', title='Bid Status Distribution')
-            st.plotly_chart(fig, use_container_width=True)
+        if total_rows:
+            # The per-status aggregate already has the counts - no row data needed
+            status_counts = metrics.set_index('status')['n']
+            st.plotly_chart(build_status_pie(status_counts), use_container_width=True)
         else:
             st.info("No data available for visualization")
     
     with tab2:
-        if not bids.empty and 'client_name' in bids.columns:
-            client_stats = bids.groupby('client_name')['status'].value_counts().unstack().fillna(0)
+        # O(clients x statuses) rows from SQL, pivoted client-side
+        client_counts = load_client_status_counts(tuple(status_filter), assigned_filter)
+        if not client_counts.empty:
+            client_stats = client_counts.pivot(
+                index='client_name', columns='status', values='n').fillna(0)
             st.bar_chart(client_stats)
         else:
             st.info("No client data available for visualization")
-    
+
     with tab3:
-        if not bids.empty and 'bid_value' in bids.columns:
-            fig = px.box(bids, y='bid_value', x='status', 
-                        title='Bid Value Distribution by Status',
-                        log_y=True)
-            st.plotly_chart(fig, use_container_width=True)
+        bid_values = load_bid_values(tuple(status_filter), assigned_filter)
+        if not bid_values.empty:
+            st.plotly_chart(build_value_box(bid_values), use_container_width=True)
         else:
             st.info("No bid value data available for visualization")
 
+@st.fragment
 def show_status_summary():
     st.header("Bid Status Overview")
-    bids = pd.read_sql("SELECT * FROM bids", conn)
-    
-    if bids.empty:
+    summary = load_status_summary()
+
+    if summary.empty:
         st.warning("No bids found in the database")
         return
 
-    # Main metrics
+    # Main metrics - computed from the small per-status aggregate
+    total_bids = int(summary['n'].sum())
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("Total Bids", len(bids))
+        st.metric("Total Bids", total_bids)
     with col2:
-        st.metric("Active Bids", len(bids[bids['status'] == 'Open']))
+        open_rows = summary[summary['status'] == 'Open']
+        st.metric("Active Bids", int(open_rows['n'].sum()))
     with col3:
-        if not pd.to_datetime(bids['created_at']).isnull().all():
-            avg_duration = (datetime.now() - pd.to_datetime(bids['created_at'])).dt.days.mean()
-            st.metric("Avg Bid Duration", f"{avg_duration:.1f} days" if not pd.isnull(avg_duration) else "N/A")
+        aged = summary.dropna(subset=['avg_days'])
+        if not aged.empty:
+            avg_duration = (aged['avg_days'] * aged['n']).sum() / aged['n'].sum()
+            st.metric("Avg Bid Duration", f"{avg_duration:.1f} days")
         else:
             st.metric("Avg Bid Duration", "N/A")
 
     # Status distribution
     st.subheader("Status Distribution")
-    status_counts = bids['status'].value_counts().reset_index()
-    status_counts.columns = ['Status', 'Count']
+    status_counts = summary[['status', 'n']].rename(columns={'status': 'Status', 'n': 'Count'})
     st.bar_chart(status_counts.set_index('Status'))
 
     # Loss reasons analysis
-    if not bids[bids['status'] == 'Lost'].empty:
+    loss_reasons = load_loss_reasons()
+    if not loss_reasons.empty:
         st.subheader("Loss Reasons Analysis")
-        loss_reasons = bids[bids['status'] == 'Lost']['reason'].value_counts()
-        if not loss_reasons.empty:
-            fig = px.pie(loss_reasons, values=loss_reasons.values, 
-                        names=loss_reasons.index, title='Reasons for Lost Bids')
-            st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(build_loss_reasons_pie(loss_reasons), use_container_width=True)
 
 def create_bid():
     st.header("New Bid Creation")
@@ -305,18 +582,20 @@ def create_bid():
             if not title or not client_name or not assigned_to:
                 st.error("Please fill required fields (*)")
             else:
-                c.execute('''INSERT INTO bids 
-                            (title, description, status, stage, due_date, 
-                             assigned_to, created_by, created_at, client_name, bid_value)
-                            VALUES (?, ?, 'Open', 'Proposal Drafting', ?, ?, ?, ?, ?, ?)''',
-                            (title, description, due_date, assigned_to, 
-                             st.session_state.user[1], datetime.now(), client_name, bid_value))
-                bid_id = c.lastrowid
-                
-                # Initialize first stage
-                update_bid_stage(bid_id, "Proposal Drafting", "Bid created")
-                
-                conn.commit()
+                # One transaction (and one fsync) for the bid plus its first stage
+                with conn:
+                    c.execute('''INSERT INTO bids
+                                (title, description, status, stage, due_date,
+                                 assigned_to, created_by, created_at, client_name, bid_value)
+                                VALUES (?, ?, 'Open', 'Proposal Drafting', ?, ?, ?, ?, ?, ?)''',
+                                (title, description, due_date, assigned_to,
+                                 st.session_state.user[1], datetime.now(), client_name, bid_value))
+                    bid_id = c.lastrowid
+
+                    # Initialize first stage
+                    update_bid_stage(bid_id, "Proposal Drafting", "Bid created", commit=False)
+
+                clear_bid_caches()
                 st.success("Bid created successfully!")
                 st.balloons()
 
@@ -331,16 +610,20 @@ def upload_to_sharepoint(uploaded_file, bid_id):
     c.execute('''INSERT INTO documents (bid_id, document_name, sharepoint_url, uploaded_at)
                  VALUES (?, ?, ?, ?)''', (bid_id, document_name, sharepoint_url, uploaded_at))
     conn.commit()
+    load_documents.clear()
     return True
 
+@st.fragment
 def document_manager():
     st.header("Document Management")
     bid_id = st.number_input("Enter Bid ID", min_value=1, step=1, key="doc_bid_id")
     
     if bid_id:
-        # Verify bid exists
-        bid_exists = pd.read_sql("SELECT 1 FROM bids WHERE id=?", conn, params=(bid_id,))
-        if bid_exists.empty:
+        # Verify bid exists - single-row check, no DataFrame needed
+        with read_conn() as ro:
+            bid_exists = ro.execute("SELECT 1 FROM bids WHERE id=? LIMIT 1",
+                                    (bid_id,)).fetchone()
+        if bid_exists is None:
             st.error("Bid not found")
             return
     
@@ -351,30 +634,33 @@ def document_manager():
     
     st.subheader("Attached Documents")
     if bid_id:
-        documents = pd.read_sql("SELECT * FROM documents WHERE bid_id=?", conn, params=(bid_id,))
+        documents = load_documents(bid_id)
         if not documents.empty:
             st.dataframe(documents)
         else:
             st.info("No documents attached to this bid")
 
+@st.fragment
 def manage_bid_process():
     st.header("Bid Process Management")
     
     bid_id = st.number_input("Enter Bid ID", min_value=1, step=1, key="process_bid_id")
     
     if bid_id:
-        # Get bid details
-        bid = pd.read_sql("SELECT * FROM bids WHERE id=?", conn, params=(bid_id,))
-        
-        if bid.empty:
+        # Get bid details - one sqlite3.Row, skipping DataFrame construction
+        with read_conn() as ro:
+            bid = ro.execute("SELECT title, status, stage FROM bids WHERE id=?",
+                             (bid_id,)).fetchone()
+
+        if bid is None:
             st.error("Bid not found")
             return
-        
-        st.subheader(f"Managing Bid: {bid.iloc[0]['title']}")
-        
+
+        st.subheader(f"Managing Bid: {bid['title']}")
+
         # Current status
-        current_status = bid.iloc[0]['status']
-        current_stage = bid.iloc[0]['stage']
+        current_status = bid['status']
+        current_stage = bid['stage']
         
         col1, col2 = st.columns(2)
         with col1:
@@ -394,64 +680,68 @@ def manage_bid_process():
                 reason = ""
                 
             if st.button("Update Status"):
-                old_status = bid.iloc[0]['status']
-                c.execute("UPDATE bids SET status=?, reason=? WHERE id=?", 
-                          (new_status, reason, bid_id))
-                log_bid_history(bid_id, "status", old_status, new_status)
-                conn.commit()
+                old_status = bid['status']
+                # One transaction for the status change, history row and stage move
+                with conn:
+                    c.execute("UPDATE bids SET status=?, reason=? WHERE id=?",
+                              (new_status, reason, bid_id))
+                    log_bid_history(bid_id, "status", old_status, new_status, commit=False)
+
+                    if new_status == "Won":
+                        update_bid_stage(bid_id, "Awarded", "Bid won!", commit=False)
+                    elif new_status == "Lost":
+                        update_bid_stage(bid_id, "Lost", f"Bid lost: {reason}", commit=False)
+                clear_bid_caches()
                 st.success(f"Status updated to {new_status}")
-                
-                if new_status == "Won":
-                    update_bid_stage(bid_id, "Awarded", "Bid won!")
-                elif new_status == "Lost":
-                    update_bid_stage(bid_id, "Lost", f"Bid lost: {reason}")
                 st.rerun()
         
         # Stage management
         with st.expander("Manage Bid Stages"):
             st.write("**Current Stage Progress**")
-            stages = pd.read_sql(
-                "SELECT * FROM bid_stages WHERE bid_id=? ORDER BY started_at",
-                conn, params=(bid_id,))
+            stages = load_bid_stages(bid_id)
             
             if not stages.empty:
                 st.dataframe(stages)
             
-            completed_stages = stages['stage'].values if not stages.empty else []
-            available_stages = [s for s in BID_STAGES.keys() if s not in completed_stages]
+            # frozenset gives O(1) membership tests against plain Python strings
+            completed_stages = frozenset(stages['stage'].tolist()) if not stages.empty else frozenset()
+            available_stages = [s for s in BID_STAGE_KEYS if s not in completed_stages]
             
             if available_stages:
                 new_stage = st.selectbox("Move to Stage", available_stages)
                 notes = st.text_area("Stage Transition Notes")
                 
                 if st.button("Transition Stage"):
-                    update_bid_stage(bid_id, new_stage, notes)
-                    c.execute("UPDATE bids SET stage=? WHERE id=?", (new_stage, bid_id))
-                    conn.commit()
+                    # One transaction for the stage rows and the bids.stage column
+                    with conn:
+                        update_bid_stage(bid_id, new_stage, notes, commit=False)
+                        c.execute("UPDATE bids SET stage=? WHERE id=?", (new_stage, bid_id))
+                    clear_bid_caches()
                     st.success(f"Bid moved to {new_stage} stage")
                     st.rerun()
             else:
                 st.info("All stages completed for this bid")
 
+@st.fragment
 def show_audit_trail():
     st.header("Bid Audit Trail")
     
     bid_id = st.number_input("Enter Bid ID to view history", min_value=1, step=1)
     
     if bid_id:
-        history = pd.read_sql(
-            "SELECT * FROM bid_history WHERE bid_id=? ORDER BY changed_at DESC",
-            conn, params=(bid_id,))
-        
+        history = load_bid_history(bid_id)
+
         if not history.empty:
             st.dataframe(history)
+            st.download_button("Download Full History (CSV)",
+                               export_history_csv(bid_id),
+                               file_name=f"bid_{bid_id}_history.csv",
+                               mime="text/csv")
         else:
             st.info("No history found for this bid")
     
     st.subheader("Recent Activity Across All Bids")
-    recent_activity = pd.read_sql(
-        "SELECT h.*, b.title as bid_title FROM bid_history h JOIN bids b ON h.bid_id = b.id ORDER BY h.changed_at DESC LIMIT 50",
-        conn)
+    recent_activity = load_recent_activity()
     
     if not recent_activity.empty:
         st.dataframe(recent_activity)
@@ -469,15 +759,17 @@ def user_admin():
         username = st.text_input("Username")
         role = st.selectbox("Role", ["salesperson", "manager", "admin"])
         if st.form_submit_button("Add User"):
-            try:
-                c.execute("INSERT INTO users (username, role) VALUES (?, ?)", (username, role))
-                conn.commit()
+            c.execute('''INSERT INTO users (username, role) VALUES (?, ?)
+                         ON CONFLICT(username) DO NOTHING''', (username, role))
+            conn.commit()
+            if c.rowcount:
+                load_users.clear()
                 st.success("User added successfully")
-            except sqlite3.IntegrityError:
+            else:
                 st.error("Username already exists")
     
     st.subheader("Existing Users")
-    users = pd.read_sql("SELECT username, role FROM users", conn)
+    users = load_users()
     st.dataframe(users)
 
 def show_main_interface():